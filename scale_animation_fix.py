@@ -9,15 +9,21 @@ bl_info = {
 }
 
 import bpy
-
-# Add a property for scale factor
-bpy.types.Scene.scale_factor = bpy.props.FloatProperty(
-    name="Scale Factor",
-    description="Scale factor for animation adjustments",
-    default=1.0,
-    min=0.1,
-    max=100.0
-)
+import numpy as np
+
+# Read an fcurve's keyframes into a float32 [K, 2] array of (frame, value) pairs
+def _kp_array(fcurve, attr="co"):
+    data = np.empty(2 * len(fcurve.keyframe_points), dtype=np.float32)
+    fcurve.keyframe_points.foreach_get(attr, data)
+    return data.reshape(-1, 2)
+
+# Apply value = value * mul + add to every keyframe (and its handles) on the fcurve
+def _transform_fcurve(fcurve, mul=1.0, add=0.0):
+    for attr in ("co", "handle_left", "handle_right"):
+        data = _kp_array(fcurve, attr)
+        data[:, 1] = data[:, 1] * mul + add
+        fcurve.keyframe_points.foreach_set(attr, data.ravel())
+    fcurve.update()
 
 # Operator to fix animation for scaled models
 class FixAnimationForScaledModelsOperator(bpy.types.Operator):
@@ -28,17 +34,14 @@ class FixAnimationForScaledModelsOperator(bpy.types.Operator):
 
     def execute(self, context):
         # Find the '_base_' armature
-        armature = None
-        for obj in bpy.context.scene.objects:
-            if obj.type == 'ARMATURE' and obj.name == "_base_":
-                armature = obj
-                break
+        armature = bpy.context.scene.objects.get("_base_")
 
-        if not armature:
+        if armature is None or armature.type != 'ARMATURE':
             self.report({'ERROR'}, "No armature named '_base_' found.")
             return {'CANCELLED'}
 
         scale_factor = context.scene.scale_factor
+        orig_frame = context.scene.frame_current
         anim_data = armature.animation_data
 
         if anim_data is None or anim_data.action is None:
@@ -46,56 +49,52 @@ class FixAnimationForScaledModelsOperator(bpy.types.Operator):
             return {'CANCELLED'}
 
         action = anim_data.action
+
+        # Re-running the operator would compound the adjustment, so remember what was applied
+        if action.get("scale_animation_fix_applied") == scale_factor:
+            self.report({'INFO'}, f"Animation already adjusted for scale factor {scale_factor}; skipping.")
+            return {'CANCELLED'}
+
         root_bone_name = "Root"
         hips_bone_name = "hips"
 
-        # Ensure we're in Pose Mode
-        if bpy.context.mode != 'POSE':
-            bpy.ops.object.mode_set(mode='POSE')
+        # Resolve pose bones and fcurves once; each fcurves.find is a linear scan,
+        # so build a (data_path, array_index) lookup in a single pass instead
+        pose_bones = armature.pose.bones
+        root_path = f"pose.bones[\"{bpy.utils.escape_identifier(root_bone_name)}\"].location"
+        hips_path = f"pose.bones[\"{bpy.utils.escape_identifier(hips_bone_name)}\"].location"
+        fc_by_key = {(fc.data_path, fc.array_index): fc for fc in action.fcurves}
+        root_fcurve = fc_by_key.get((root_path, 1))
+        hips_fcurve = fc_by_key.get((hips_path, 1))
+        first_frame = int(action.frame_range[0])
 
         # Get hips Y position in the first frame and invert it
         hips_y_offset = 0.0
-        first_frame = int(action.frame_range[0])
-        bpy.context.scene.frame_set(first_frame)
-        if hips_bone_name in armature.pose.bones:
-            hips_bone = armature.pose.bones[hips_bone_name]
-            fcurve_loc_y = anim_data.action.fcurves.find(data_path=f"pose.bones[\"{hips_bone_name}\"].location", index=1)
-            if fcurve_loc_y:
-                for keyframe in fcurve_loc_y.keyframe_points:
-                    if keyframe.co[0] == first_frame:
-                        hips_y_offset = -keyframe.co[1]  # Invert the Y position
-                        break
-            else:
-                hips_y_offset = -hips_bone.location.y  # Invert the current Y position if no keyframe
+        if hips_fcurve:
+            hips_y_offset = -hips_fcurve.evaluate(first_frame)  # Invert the Y position
+        elif hips_bone_name in pose_bones:
+            hips_y_offset = -pose_bones[hips_bone_name].location.y  # Invert the current Y position if no fcurve
 
         # Scale the inverted hips Y offset by the scale factor
         scaled_hips_offset = hips_y_offset * scale_factor
 
+        # At the default scale with no offset there is nothing to adjust
+        if scale_factor == 1.0 and scaled_hips_offset == 0.0:
+            self.report({'INFO'}, "Scale factor is 1.0 and hips offset is zero; nothing to adjust.")
+            return {'FINISHED'}
+
         # Process Root bone translation (Y-axis)
-        if root_bone_name in armature.pose.bones:
-            root_bone = armature.pose.bones[root_bone_name]
-            fcurve_loc_y = anim_data.action.fcurves.find(data_path=f"pose.bones[\"{root_bone_name}\"].location", index=1)
-            
-            for frame in range(int(action.frame_range[0]), int(action.frame_range[1]) + 1):
-                bpy.context.scene.frame_set(frame)
-                
-                # Apply scale factor plus scaled hips offset to Y-axis translation if keyframe exists
-                if fcurve_loc_y and any(kp.co[0] == frame for kp in fcurve_loc_y.keyframe_points):
-                    root_bone.location.y += scale_factor + scaled_hips_offset  # Translate by scale factor + hips offset
-                    root_bone.keyframe_insert(data_path="location", index=1, frame=frame)
+        if root_bone_name in pose_bones and root_fcurve and len(root_fcurve.keyframe_points):
+            _transform_fcurve(root_fcurve, add=scale_factor + scaled_hips_offset)  # Translate by scale factor + hips offset
 
         # Process hips bone Y-axis keyframes directly
-        if hips_bone_name in armature.pose.bones:
-            hips_bone = armature.pose.bones[hips_bone_name]
-            fcurve_loc_y = anim_data.action.fcurves.find(data_path=f"pose.bones[\"{hips_bone_name}\"].location", index=1)
-            
-            if fcurve_loc_y:
-                for keyframe in fcurve_loc_y.keyframe_points:
-                    keyframe.co[1] *= scale_factor  # Multiply Y-axis value by scale factor
-                    # Update the bone's pose to reflect the new keyframe value
-                    bpy.context.scene.frame_set(int(keyframe.co[0]))
-                    hips_bone.location.y = keyframe.co[1]
-                    hips_bone.keyframe_insert(data_path="location", index=1, frame=keyframe.co[0])
+        if hips_bone_name in pose_bones and hips_fcurve and len(hips_fcurve.keyframe_points):
+            _transform_fcurve(hips_fcurve, mul=scale_factor)  # Multiply Y-axis values by scale factor
+
+        action["scale_animation_fix_applied"] = scale_factor
+
+        # Single frame_set at the end so the evaluated pose picks up the edited fcurves
+        context.scene.frame_set(orig_frame)
 
         self.report({'INFO'}, f"Animation adjusted for scale factor {scale_factor} on '_base_' armature with hips offset {scaled_hips_offset:.3f}.")
         return {'FINISHED'}